@@ -1,10 +1,14 @@
 """Drives the process of translating Hack VM into Hack assembly"""
 import sys
 import argparse
+import hashlib
+import logging
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import os.path
 from parser import HackParser, ParserError
-from translation_unit import TranslationUnit
+from translation_unit import TranslationUnit, fuse_stack_ops
 
 def parse_command_line_args(default_outfile_name):
     """Parse Command Line Arguments.
@@ -18,15 +22,45 @@ def parse_command_line_args(default_outfile_name):
                             help=f"Output file name. Default is {default_outfile_name}")
     arg_parser.add_argument('-b', '--boot', dest='bootstrap_required', action='store_true',
                             help='If flag is set then asm output will begin with bootstrap instructions')
+    arg_parser.add_argument('-q', '--quiet', dest='quiet', action='store_true',
+                            help='Only report warnings and errors')
     # Parse command line args
     args = arg_parser.parse_args()
 
     return {
         'source': args.source,
         'output_file': args.output_file,
-        'bootstrap_required': args.bootstrap_required
+        'bootstrap_required': args.bootstrap_required,
+        'quiet': args.quiet
     }
 
+def get_cache_key(vm_files, bootstrap_required):
+    """Builds a hash identifying this translation run for the output cache.
+
+    The cache has to be keyed over the whole run, not per file: return
+    labels ({function}$ret.N) are numbered by a call counter that runs
+    across all files, so a file's asm depends on the files translated
+    before it. The key covers every (filename, content) pair in order,
+    the bootstrap flag and the translator version.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(f'v{TranslationUnit.CACHE_VERSION} boot={bootstrap_required}'.encode())
+    for vm_file in vm_files:
+        hasher.update(vm_file['filename'].encode())
+        hasher.update(''.join(vm_file['commands']).encode())
+    return hasher.hexdigest()
+
+def read_vm_file(path, filename):
+    """Reads a .vm file and returns its file dict for the parser.
+
+    filename is the file's name without the .vm extension.
+    """
+    with open(path) as vm_file:
+        return {
+            'filename': filename,
+            'commands': vm_file.readlines()
+        }
+
 # List of dictionaries containing data on files to be translated.
 # Each file dict has a 'filename' and 'commands' key:
 # filename is the name of the file including extension.
@@ -36,15 +70,15 @@ VM_FILES = []
 # Create parser instance which requires a translator instance
 PARSER = HackParser(TranslationUnit())
 
-# This list will hold all ASM commands from all files being translated.
-ASM = []
-
 # Parse command line arguments
 ARGS = parse_command_line_args('out.asm')
 
-# If -b, --boot flag provided then set bootstrap code
-if ARGS['bootstrap_required']:
-    ASM.append(PARSER.translator.get_bootstrap_instructions())
+# Progress output goes through logging so that -q, --quiet (or a host
+# application using this as a library) can gate it by level instead of
+# paying for unconditional prints.
+logging.basicConfig(format='%(message)s',
+                    level=logging.WARNING if ARGS['quiet'] else logging.INFO)
+LOGGER = logging.getLogger(__name__)
 
 # Source file or directory
 SOURCE = ARGS['source']
@@ -55,42 +89,77 @@ SOURCE = Path(SOURCE)
 
 # Check if source is file, directory or doesn't exist
 if SOURCE.is_file():
-    with open(SOURCE) as FILE:
-        VM_FILES.append({
-            'filename': os.path.basename(SOURCE)[0:-3],
-            'commands': FILE.readlines()
-        })
+    VM_FILES.append(read_vm_file(SOURCE, os.path.basename(SOURCE)[0:-3]))
 elif SOURCE.is_dir():
-    for VM_FILE in list(SOURCE.glob('./*.vm')):
-        with open(VM_FILE) as FILE:
-            VM_FILES.append({
-                'filename': os.path.basename(VM_FILE)[0:-3],
-                'commands': FILE.readlines()
-            })
+    # os.scandir hands back DirEntry objects whose name and file type
+    # are already known, avoiding the Path allocation and extra stat
+    # per file that SOURCE.glob('./*.vm') paid. Sorted so the output
+    # file order doesn't depend on directory order.
+    with os.scandir(SOURCE) as DIR_ENTRIES:
+        VM_FILE_PATHS = sorted((ENTRY.path, ENTRY.name[:-3]) for ENTRY in DIR_ENTRIES
+                               if ENTRY.name.endswith('.vm') and ENTRY.is_file())
+    if VM_FILE_PATHS:
+        # Read all source files concurrently; threads release the GIL
+        # during the blocking read syscalls so the waits overlap.
+        # executor.map preserves the order of the paths.
+        with ThreadPoolExecutor(max_workers=min(32, len(VM_FILE_PATHS))) as executor:
+            VM_FILES = list(executor.map(read_vm_file,
+                                         *zip(*VM_FILE_PATHS)))
 else:
     raise FileNotFoundError(f'{SOURCE} is not a file or directory')
 
 # Start translation process
-print('>>> Translation started')
+LOGGER.info('>>> Translation started')
+
+# Translated output from previous runs is cached on disk keyed by the
+# source content, so re-translating an unchanged program is one file copy
+CACHE_DIR = Path(os.path.expanduser('~')) / '.cache' / 'vm_translator'
+CACHE_FILE = CACHE_DIR / (get_cache_key(VM_FILES, ARGS['bootstrap_required']) + '.asm')
 
+if CACHE_FILE.is_file():
+    shutil.copyfile(CACHE_FILE, OUTPUT_FILE)
+    LOGGER.info('>>> Translation finished (cached)')
+    sys.exit()
+
+# Asm is streamed to the output file as each command is translated
+# rather than being collected in a list and written in a second pass.
+# If translation fails, the partially written file is left on disk
+# for diagnosis.
 try:
-    for VM_FILE in VM_FILES:
-        PARSER.set_new_file(VM_FILE)
-        ASM += PARSER.run()
+    # asm output is pure ASCII; say so rather than paying for (and
+    # implying) a default UTF-8 round trip
+    with open(OUTPUT_FILE, 'w', encoding='ascii') as output_file:
+        # If -b, --boot flag provided then write bootstrap code first
+        if ARGS['bootstrap_required']:
+            output_file.write(PARSER.translator.get_bootstrap_instructions())
+        for VM_FILE in VM_FILES:
+            PARSER.set_new_file(VM_FILE)
+            # writelines consumes the generator in C, avoiding a
+            # Python-level write call per translated command.
+            # fuse_stack_ops streams the chunks through the peephole
+            # pass that cancels adjacent push/pop stack round trips.
+            output_file.writelines(fuse_stack_ops(PARSER.run()))
 except ParserError as err:
     # Parser error
     MSG = f'- Parser error on line number {err.line_no} in {err.filename}.vm:\n  '
-    print(MSG + str(err))
+    LOGGER.error(MSG + str(err))
     sys.exit()
 except ValueError as err:
     # TODO: make this a Translator specific error
     MSG = f'- Translator error:\n  '
-    print(MSG + str(err))
+    LOGGER.error(MSG + str(err))
     sys.exit()
 
-with open(OUTPUT_FILE, 'w') as output_file:
-    for command in ASM:
-        output_file.write(command)
+# Save a copy of the fresh output for next time. The copy is written to
+# a temp name and renamed so a parallel run never reads a partial entry.
+# Cache problems (read-only home, full disk) only cost the speedup.
+try:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    TMP_CACHE = CACHE_FILE.with_name(f'{CACHE_FILE.name}.{os.getpid()}.tmp')
+    shutil.copyfile(OUTPUT_FILE, TMP_CACHE)
+    os.replace(TMP_CACHE, CACHE_FILE)
+except OSError as err:
+    LOGGER.warning('Could not cache translation output: %s', err)
 
-print('>>> Translation finished')
+LOGGER.info('>>> Translation finished')
 # Translation process finished
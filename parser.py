@@ -1,4 +1,19 @@
 """This module contains the HackParser and ParserError classes"""
+from sys import intern
+
+# Command type identifiers.
+# Module-level ints so command types can be compared and dispatched on
+# directly without a dict lookup per command.
+_C_ARITHMETIC = 1
+_C_PUSH = 2
+_C_POP = 3
+_C_LABEL = 4
+_C_GOTO = 5
+_C_IF = 6
+_C_FUNCTION = 7
+_C_RETURN = 8
+_C_CALL = 9
+
 
 class HackParser:
     """This class parses and controls translation of the provided source file.
@@ -17,133 +32,209 @@ class HackParser:
 
     Attributes:
         line_no (int): Current line number of source being parsed.
-        source_commands (list of strings): List of source comands to parse.
+        source_commands (list of tuples): (line_no, tokens, handler)
+            triples for each real command in the source (comments and
+            blank lines dropped).
         translator: Implementation of Hack Source Translator to use.
         file_set (bool): False if file needs to be set via set_new_file function.
     """
 
-    # Command type names mapped to values
-    __COMMAND_TYPES = {
-        'C_ARITHMETIC': 1, 'C_PUSH': 2, 'C_POP': 3, 'C_LABEL': 4, 'C_GOTO': 5,
-        'C_IF': 6, 'C_FUNCTION': 7, 'C_RETURN': 8, 'C_CALL': 9
-    }
-
-    # Memory segments that can be popped to
-    __POP_STACKS = ['static', 'local', 'this', 'that',
-                    'argument', 'pointer', 'temp']
+    # Memory segments that can be popped to.
+    # Frozensets so membership tests are a hash lookup, not a scan.
+    __POP_STACKS = frozenset(('static', 'local', 'this', 'that',
+                              'argument', 'pointer', 'temp'))
 
     # Memory segments that can be pushed to (all same as pop plus constant seg)
-    __PUSH_STACKS = __POP_STACKS[:]
-    __PUSH_STACKS.append('constant')
+    __PUSH_STACKS = __POP_STACKS | {'constant'}
 
     # Arithmetic commands
-    __ARITHMETIC_COMMANDS = ('add', 'sub', 'neg',
-                             'eq', 'gt', 'lt', 'and', 'or', 'not')
+    __ARITHMETIC_COMMANDS = frozenset(('add', 'sub', 'neg',
+                                       'eq', 'gt', 'lt', 'and', 'or', 'not'))
 
     # Command types that have a 2nd argument
-    __ARG2_LIST = [
-        __COMMAND_TYPES['C_PUSH'],
-        __COMMAND_TYPES['C_POP'],
-        __COMMAND_TYPES['C_FUNCTION'],
-        __COMMAND_TYPES['C_CALL']
-    ]
+    __ARG2_SET = frozenset((_C_PUSH, _C_POP, _C_FUNCTION, _C_CALL))
+
+    # Opcodes mapped to (expected token count, command type).
+    # Recognising a command is then one dict lookup plus a length
+    # compare instead of a chain of string comparisons.
+    __OPCODES = {
+        'push': (3, _C_PUSH),
+        'pop': (3, _C_POP),
+        'call': (3, _C_CALL),
+        'function': (3, _C_FUNCTION),
+        'label': (2, _C_LABEL),
+        'goto': (2, _C_GOTO),
+        'if-goto': (2, _C_IF),
+        'return': (1, _C_RETURN)
+    }
+
+    # Source-echo headers for the commands whose text is fixed
+    # (arithmetic ops and return), so emitting them skips the f-string
+    # formatting that variable commands like push/pop still need.
+    __FIXED_HEADERS = {op: f'// --- {op} ---\n'
+                       for op in __ARITHMETIC_COMMANDS.union(('return',))}
 
     def __init__(self, translator, file_data=None):
         self.translator = translator
         self.file_set = False
+        # Command types mapped to their handlers. Built once here so the
+        # hot loop in run() is a single dict lookup plus a call rather
+        # than an if/elif chain re-testing the command type.
+        self._dispatch = {
+            _C_ARITHMETIC: self.__do_arithmetic,
+            _C_PUSH: self.__do_push,
+            _C_POP: self.__do_pop,
+            _C_LABEL: self.__do_label,
+            _C_GOTO: self.__do_goto,
+            _C_IF: self.__do_if_goto,
+            _C_FUNCTION: self.__do_function,
+            _C_RETURN: self.__do_return,
+            _C_CALL: self.__do_call
+        }
         if file_data:
             self.set_new_file(file_data)
 
     def set_new_file(self, new_file):
-        """Sets the source VM commands and name of file to be compiled"""
+        """Sets the source VM commands and name of file to be compiled
+
+        Comments and blank lines are dropped here so that run() only ever
+        sees real commands. Each command is classified as it is loaded
+        and stored as a (line_no, tokens, handler) triple, where line_no
+        is the line's number in the original source file (so errors
+        report the true location) and handler is the bound method that
+        will translate the command. run() is then a bare loop over
+        already-resolved handlers.
+        """
         self.line_no = 0
         self.source_commands = []
-        for command in new_file['commands']:
-            command = command.split('//', 1)[0].strip()
-            self.source_commands.append(command.strip())
-        self.translator.set_filename(new_file['filename'])
+        # Locals for everything touched per line; attribute lookups in
+        # this loop would otherwise run once per source line.
+        append = self.source_commands.append
+        dispatch = self._dispatch
+        filename = new_file['filename']
+        self.translator.set_filename(filename)
+        for line_no, command in enumerate(new_file['commands'], 1):
+            tokens = command.split('//', 1)[0].split()
+            if tokens:
+                # Interning the opcode means dict/set lookups on it hit
+                # the identity fast path instead of comparing characters
+                tokens[0] = intern(tokens[0])
+                if len(tokens) == 3 and tokens[0] in ('push', 'pop', 'function', 'call'):
+                    # Parse the numeric argument once here so the
+                    # translator receives an int with no further
+                    # conversion or digit-scanning on the hot path.
+                    try:
+                        offset = int(tokens[2])
+                    except ValueError:
+                        offset = -1
+                    if offset < 0:
+                        raise ParserError(
+                            self.__get_illegal_offset_message(tokens[2]),
+                            ' '.join(tokens), line_no, filename)
+                    tokens[2] = offset
+                self.line_no = line_no
+                command_type = self.__get_command_type(tokens)
+                append((line_no, tokens, dispatch[command_type]))
         self.file_set = True
 
     def run(self):
-        """Drives the translation process"""
+        """Drives the translation process.
+
+        Yields the translated asm one command at a time so the caller can
+        stream it straight to the output file instead of buffering the
+        whole program in memory.
+        """
         if not self.file_set:
             raise ParserError("No source commands provided", False, 0, self.translator.filename)
-        # This list will be filled with assembly from translator
-        asm_list = []
-        for command in self.source_commands:
-            self.line_no += 1
-            # If current command is not a comment or blank line then process command
-            if not self.__is_comment_or_empty_line(command):
-                command_type = self.__get_command_type(command)
-                if command_type == self.__COMMAND_TYPES['C_PUSH']:
-                    segment = self.__get_arg_1(command, command_type, self.line_no, self.translator.filename)
-                    offset = self.__get_arg_2(command, command_type, self.line_no, self.translator.filename)
-                    asm = self.translator.push_command(segment, offset)
-                    asm_list.append(f'// --- {command} ---\n{asm}')
-                elif command_type == self.__COMMAND_TYPES['C_POP']:
-                    segment = self.__get_arg_1(command, command_type, self.line_no, self.translator.filename)
-                    offset = self.__get_arg_2(command, command_type, self.line_no, self.translator.filename)
-                    asm = self.translator.pop_command(segment, offset)
-                    asm_list.append(f'// --- {command} ---\n{asm}')
-                elif command_type == self.__COMMAND_TYPES['C_ARITHMETIC']:
-                    asm = self.translator.arithmetic_command(command)
-                    asm_list.append(f'// --- {command} ---\n{asm}')
-                elif command_type == self.__COMMAND_TYPES['C_LABEL']:
-                    label = self.__get_arg_1(command, command_type, self.line_no, self.translator.filename)
-                    asm = self.translator.label_command(label)
-                    asm_list.append(f'// --- {command} ---\n{asm}')
-                elif command_type == self.__COMMAND_TYPES['C_GOTO']:
-                    label = self.__get_arg_1(command, command_type, self.line_no, self.translator.filename)
-                    asm = self.translator.unconditional_goto_command(label)
-                    asm_list.append(f'// --- {command} ---\n{asm}')
-                elif command_type == self.__COMMAND_TYPES['C_IF']:
-                    label = self.__get_arg_1(command, command_type, self.line_no, self.translator.filename)
-                    asm = self.translator.conditional_goto_command(label)
-                    asm_list.append(f'// --- {command} ---\n{asm}')
-                elif command_type == self.__COMMAND_TYPES['C_CALL']:
-                    function_name = self.__get_arg_1(command, command_type, self.line_no, self.translator.filename)
-                    arg_count = self.__get_arg_2(command, command_type, self.line_no, self.translator.filename)
-                    asm = self.translator.call_function(function_name, arg_count)
-                    asm_list.append(f'// --- {command} ---\n{asm}')
-                elif command_type == self.__COMMAND_TYPES['C_FUNCTION']:
-                    function_name = self.__get_arg_1(command, command_type, self.line_no, self.translator.filename)
-                    local_count = self.__get_arg_2(command, command_type, self.line_no, self.translator.filename)
-                    asm = self.translator.function_declaration(function_name, local_count)
-                    asm_list.append(f'// --- {command} ---\n{asm}')
-                elif command_type == self.__COMMAND_TYPES['C_RETURN']:
-                    asm = self.translator.return_from_function()
-                    asm_list.append(f'// --- {command} ---\n{asm}')
+        fixed_headers = self.__FIXED_HEADERS
+        for line_no, tokens, handler in self.source_commands:
+            self.line_no = line_no
+            asm = handler(tokens, line_no)
+            if len(tokens) == 1:
+                # Arithmetic/return commands reuse a precomputed header
+                yield fixed_headers[tokens[0]] + asm
+            else:
+                # map(str, ...) as the numeric arg token is already an int
+                yield f"// --- {' '.join(map(str, tokens))} ---\n{asm}"
         self.file_set = False
-        return asm_list
-                    
+
+    def translate(self, file_data):
+        """Translates a whole file in one call and returns the asm as a string.
+
+        Batch convenience over set_new_file + run for callers that want
+        the translated file as a single value rather than a stream: one
+        method call per file, with the per-command work staying inside
+        run()'s handler loop and a single join at the end.
+
+        Args:
+            file_data (dict): File data as accepted by set_new_file.
+        """
+        self.set_new_file(file_data)
+        return ''.join(self.run())
+
+    # --- Command handlers --- #
+    # One per command type, looked up via the dispatch table in run().
+    # Each takes the tokenized command and its line number and returns
+    # the translated asm.
+
+    def __do_arithmetic(self, command, line_no):
+        return self.translator.arithmetic_command(command[0])
+
+    def __do_push(self, command, line_no):
+        translator = self.translator
+        segment = self.__get_arg_1(command, _C_PUSH, line_no, translator.filename)
+        offset = self.__get_arg_2(command, _C_PUSH, line_no, translator.filename)
+        return translator.push_command(segment, offset)
+
+    def __do_pop(self, command, line_no):
+        translator = self.translator
+        segment = self.__get_arg_1(command, _C_POP, line_no, translator.filename)
+        offset = self.__get_arg_2(command, _C_POP, line_no, translator.filename)
+        return translator.pop_command(segment, offset)
+
+    def __do_label(self, command, line_no):
+        label = self.__get_arg_1(command, _C_LABEL, line_no, self.translator.filename)
+        return self.translator.label_command(label)
+
+    def __do_goto(self, command, line_no):
+        label = self.__get_arg_1(command, _C_GOTO, line_no, self.translator.filename)
+        return self.translator.unconditional_goto_command(label)
+
+    def __do_if_goto(self, command, line_no):
+        label = self.__get_arg_1(command, _C_IF, line_no, self.translator.filename)
+        return self.translator.conditional_goto_command(label)
+
+    def __do_function(self, command, line_no):
+        translator = self.translator
+        function_name = self.__get_arg_1(command, _C_FUNCTION, line_no, translator.filename)
+        local_count = self.__get_arg_2(command, _C_FUNCTION, line_no, translator.filename)
+        return translator.function_declaration(function_name, local_count)
+
+    def __do_return(self, command, line_no):
+        return self.translator.return_from_function()
+
+    def __do_call(self, command, line_no):
+        translator = self.translator
+        function_name = self.__get_arg_1(command, _C_CALL, line_no, translator.filename)
+        arg_count = self.__get_arg_2(command, _C_CALL, line_no, translator.filename)
+        return translator.call_function(function_name, arg_count)
+
     def __get_command_type(self, command):
-        """Returns the type of the command passed in (or raises an Exception)"""
-        # Split command into parts (space is default delimiter)
-        command = command.split()
-        if len(command) == 3:
-            # If command has 3x parts then it could be a push to or pop from stack
-            if command[0] == 'push':
-                return self.__check_push_command(command, self.line_no, self.translator.filename)
-            elif command[0] == 'pop':
-                return self.__check_pop_command(command, self.line_no, self.translator.filename)
-            elif command[0] == 'call':
-                return self.__COMMAND_TYPES['C_CALL']
-            elif command[0] == 'function':
-                return self.__COMMAND_TYPES['C_FUNCTION']
-        elif len(command) == 2:
-            if command[0] == 'label':
-                return self.__COMMAND_TYPES['C_LABEL']
-            elif command[0] == 'goto':
-                return self.__COMMAND_TYPES['C_GOTO']
-            elif command[0] == 'if-goto':
-                return self.__COMMAND_TYPES['C_IF']
-        elif len(command) == 1:
-            if command[0] == 'return':
-                return self.__COMMAND_TYPES['C_RETURN']
-            elif command[0] in self.__ARITHMETIC_COMMANDS:
-                return self.__COMMAND_TYPES['C_ARITHMETIC']
+        """Returns the type of the tokenized command passed in (or raises an Exception)"""
+        entry = self.__OPCODES.get(command[0])
+        if entry is not None:
+            expected_argc, command_type = entry
+            if len(command) == expected_argc:
+                # push/pop also need their memory segment validated
+                if command_type == _C_PUSH:
+                    return self.__check_push_command(command, self.line_no, self.translator.filename)
+                if command_type == _C_POP:
+                    return self.__check_pop_command(command, self.line_no, self.translator.filename)
+                return command_type
+        elif len(command) == 1 and command[0] in self.__ARITHMETIC_COMMANDS:
+            return _C_ARITHMETIC
         raise ParserError(
-            self.__get_unrecognised_command_msg(' '.join(command)),
+            self.__get_unrecognised_command_msg(' '.join(map(str, command))),
             command, self.line_no, self.translator.filename
         )
 
@@ -153,13 +244,10 @@ class HackParser:
         # Provided segment not in available push segments? Raise Exception
         if not command[1] in cls.__PUSH_STACKS:
             raise ParserError(
-                cls.__get_unrecognised_mem_seg_msg(command[1]), ' '.join(command), line_no, filename)
-        # Provided offset not a digit? Raise Exception
-        if not command[2].isdigit():
-            raise ParserError(
-                cls.__get_illegal_offset_message(command[2]), ' '.join(command), line_no, filename)
+                cls.__get_unrecognised_mem_seg_msg(command[1]), ' '.join(map(str, command)), line_no, filename)
+        # Offset was already validated and parsed to an int in set_new_file
         # All good, return push command type
-        return cls.__COMMAND_TYPES['C_PUSH']
+        return _C_PUSH
 
     @classmethod
     def __check_pop_command(cls, command, line_no, filename):
@@ -167,58 +255,40 @@ class HackParser:
         # Provided segment not in available pop segments? Raise Exception
         if not command[1] in cls.__POP_STACKS:
             raise ParserError(
-                cls.__get_unrecognised_mem_seg_msg(command[1]), ' '.join(command), line_no, filename)
-        # Provided offset not a digit? Raise Exception
-        if not command[2].isdigit():
-            raise ParserError(
-                cls.__get_illegal_offset_message(command[2]), ' '.join(command), line_no, filename)
+                cls.__get_unrecognised_mem_seg_msg(command[1]), ' '.join(map(str, command)), line_no, filename)
+        # Offset was already validated and parsed to an int in set_new_file
         # All good, return pop command type
-        return cls.__COMMAND_TYPES['C_POP']
-    
+        return _C_POP
+
     @classmethod
     def __get_arg_1(cls, command, command_type, line_no, filename):
-        """Returns the first argument of the given command
+        """Returns the first argument of the given tokenized command
 
         In the case of C_ARITHMETIC, returns the command itself (add, sub etc)
         Should not be called if command is C_RETURN
         """
 
-        if command_type == cls.__COMMAND_TYPES['C_RETURN']:
-            raise ParserError("Cannot get arg 1 of return command type", command, line_no, filename)
-
-        command_split = command.split()
+        if command_type == _C_RETURN:
+            raise ParserError(
+                "Cannot get arg 1 of return command type", ' '.join(map(str, command)), line_no, filename)
 
-        if command_type == cls.__COMMAND_TYPES['C_ARITHMETIC']:
-            return command_split[0]
+        if command_type == _C_ARITHMETIC:
+            return command[0]
         else:
-            return command_split[1]
-        raise ParserError(
-            "Cannot get argument 1 of command: " + command, command, line_no, filename)
+            return command[1]
 
     @classmethod
     def __get_arg_2(cls, command, command_type, line_no, filename):
-        """Returns the second argument of the given command
-        
+        """Returns the second argument of the given tokenized command
+
         Should only be called for the following command types:
         C_PUSH, C_POP, C_FUNCTION, C_CALL
         """
-        command = command.split()
-        if command_type in cls.__ARG2_LIST:
-            return int(command[2])
+        if command_type in cls.__ARG2_SET:
+            return command[2]
+        command = ' '.join(map(str, command))
         raise ParserError(
-            "Cannot get argument 2 of command: " + ' '.join(command), ' '.join(command), line_no, filename)
-
-    @staticmethod
-    def __is_comment_or_empty_line(command):
-        """Returns True if command is a comment, False otherwise.
-        
-        This will split command into 2 from the start of the first comment.
-        If command begins with a comment then the command is an empty string.
-        This also strips out inline comments.
-
-        """
-        command = command.strip().split('//', 1)[0]
-        return True if not command else False
+            "Cannot get argument 2 of command: " + command, command, line_no, filename)
 
     @staticmethod
     def __get_unrecognised_command_msg(command):
@@ -1,8 +1,219 @@
 """This module contains the TranslationUnit class"""
+from collections import defaultdict
+from itertools import count
+from sys import intern
+
+# --- Precomputed asm templates --- #
+# The translator's job is almost entirely emitting the same short asm
+# sequences over and over, so the fixed parts are baked into template
+# strings once at import time. Push/pop templates carry the offset (or
+# computed address) as their single %d hole, turning each emission into
+# one %-format instead of a chain of f-strings and concatenations.
+
+# Memory segment names mapped to their asm labels. The labels are
+# interned so dict lookups keyed on them hit the identity fast path.
+_MEM_SEG_MAP = {'local': intern('LCL'), 'argument': intern('ARG'),
+                'this': intern('THIS'), 'that': intern('THAT')}
+
+# Per-segment '@label\n' and '@label\nD=M\n' fragments, prebuilt so the
+# emitters that still assemble asm piecewise concatenate constants
+# instead of formatting the label into a fresh string each time
+_ADDR_SEG = {_segment: f'@{_label}\n' for _segment, _label in _MEM_SEG_MAP.items()}
+_LOAD_SEG_D = {_segment: _addr + 'D=M\n' for _segment, _addr in _ADDR_SEG.items()}
+
+# The same fragments keyed by the asm label itself, for the call-frame
+# code that works with labels directly
+_LOAD_LABEL_D = {_label: f'@{_label}\nD=M\n' for _label in _MEM_SEG_MAP.values()}
+
+# Pushes the value in the D register onto the stack
+_PUSH_D_TO_STACK = ('@SP\n'
+                    'A=M\n'
+                    'M=D\n'
+                    '@SP\n'
+                    'M=M+1\n')
+
+# Pops the top of the stack into the D register
+_POP_STACK_TO_D = ('@SP\n'
+                   'AM=M-1\n'  # Decrement and Dereference Stack pointer
+                   'D=M\n')    # Bring target value into D register
+
+# Complete push command per segment; hole is the offset
+_PUSH_TEMPLATES = {'constant': '@%d\nD=A\n' + _PUSH_D_TO_STACK}
+for _segment, _label in _MEM_SEG_MAP.items():
+    _PUSH_TEMPLATES[_segment] = (f'@{_label}\n'
+                                 'D=M\n'
+                                 '@%d\n'
+                                 'A=D+A\n'
+                                 'D=M\n' + _PUSH_D_TO_STACK)
+
+# Complete pop command per segment for offsets > 1 (the 0/1 offset
+# cases have shorter special-case forms); hole is the offset
+_POP_TEMPLATES = {}
+for _segment, _label in _MEM_SEG_MAP.items():
+    _POP_TEMPLATES[_segment] = (f'@{_label}\n'  # Address target base pointer
+                                'D=M\n'     # Base address of target segment into D
+                                '@%d\n'     # Offset into A so it can be added
+                                'D=D+A\n'   # Add offset to base address
+                                '@R13\n'    # Address virtual register 13
+                                'M=D\n'     # Store targeted memory address in R13
+                                + _POP_STACK_TO_D +
+                                '@R13\n'
+                                'A=M\n'
+                                'M=D\n')
+del _segment, _label
+
+# Push from / pop to the temp segment; hole is the precomputed RAM address
+_PUSH_TEMP_TEMPLATE = '@%d\nD=M\n' + _PUSH_D_TO_STACK
+_POP_TEMP_TEMPLATE = _POP_STACK_TO_D + '@%d\nM=D\n'
+
+# The temp segment is 8 registers at RAM[5..12] and pointer is just
+# THIS/THAT, so every legal push/pop for them is fully built here and
+# emission is a bounds check plus a tuple index
+_PUSH_TEMP = tuple(_PUSH_TEMP_TEMPLATE % (5 + _offset) for _offset in range(8))
+_POP_TEMP = tuple(_POP_TEMP_TEMPLATE % (5 + _offset) for _offset in range(8))
+_PUSH_POINTER = (_LOAD_SEG_D['this'] + _PUSH_D_TO_STACK,
+                 _LOAD_SEG_D['that'] + _PUSH_D_TO_STACK)
+_POP_POINTER = (_POP_STACK_TO_D + _ADDR_SEG['this'] + 'M=D\n',
+                _POP_STACK_TO_D + _ADDR_SEG['that'] + 'M=D\n')
+
+# Arithmetic and logical commands whose asm never varies
+_ADD_ASM = _POP_STACK_TO_D + 'A=A-1\nM=M+D\n'
+_SUB_ASM = _POP_STACK_TO_D + 'A=A-1\nM=M-D\n'
+_AND_ASM = _POP_STACK_TO_D + 'A=A-1\nM=D&M\n'
+_OR_ASM = _POP_STACK_TO_D + 'A=A-1\nM=D|M\n'
+_NEG_ASM = '@SP\nA=M-1\nM=-M\n'
+_NOT_ASM = '@SP\nA=M-1\nM=!M\n'
+
+# Initialises one local variable to 0 in a function declaration
+_LOCAL_INIT_ASM = ('@SP\n'
+                   'A=M\n'
+                   'M=0\n'
+                   '@SP\n'
+                   'M=M+1\n')
+
+# Unrolled local-init blocks for the function sizes seen in practice;
+# bigger functions fall back to string repetition (one allocation)
+_LOCAL_INIT_TABLE = tuple(_LOCAL_INIT_ASM * n for n in range(17))
+
+# '@n\n' instructions for small n, so emitters that address a constant
+# computed at translation time (call setup) index a table instead of
+# formatting a fresh string per command
+_AT_DEC = tuple(f'@{_n}\n' for _n in range(64))
+
+# Restores the caller's LCL/ARG/THIS/THAT from its call frame. The
+# end-of-frame address always lives in R13 and the frame is always 5
+# words (see return_from_function), so the four 8-line blocks the old
+# per-return loop built are in fact one constant, unrolled here once.
+_RESTORE_CALLER_ASM = ''.join(
+    '@R13\n'
+    'D=M\n'
+    f'@{5 - _index}\n'
+    'D=D-A\n'
+    'A=D\n'
+    'D=M\n'
+    f'@{_label}\n'
+    'M=D\n'
+    for _index, _label in enumerate(('LCL', 'ARG', 'THIS', 'THAT'), 1)
+)
+
+# Writes the D register to the top of the stack in place. This is the
+# fused form of _PUSH_D_TO_STACK immediately followed by
+# _POP_STACK_TO_D: the SP increment/decrement round trip cancels out,
+# and afterwards A addresses the top slot, M and D both hold the pushed
+# value - exactly the machine state the unfused pair leaves behind.
+_WRITE_D_TO_TOP = ('@SP\n'
+                   'A=M\n'
+                   'M=D\n')
+
+# Writes D into the next stack slot during a coalesced push run,
+# bumping SP as a side effect of the addressing (AM=M+1). While a run
+# is open, SP trails the logical stack top by one slot and the run is
+# closed by a single _SP_INCREMENT.
+_PUSH_RUN_WRITE = ('@SP\n'
+                   'AM=M+1\n'
+                   'M=D\n')
+
+_SP_INCREMENT = ('@SP\n'
+                 'M=M+1\n')
+
+
+def fuse_stack_ops(chunks):
+    """Peephole-fuses adjacent stack operations in a stream of asm chunks.
+
+    chunks is an iterable of translated commands as produced by
+    HackParser.run(): each chunk is one '// --- ... ---' header line
+    followed by its asm. Two rewrites are applied, both matching exact
+    templates at chunk boundaries only:
+
+    - push followed by a stack-consuming command (pop, arithmetic,
+      comparison, if-goto): the SP increment/decrement round trip
+      cancels and the pair is rewritten around _WRITE_D_TO_TOP.
+    - a run of consecutive pushes: only the first write pays the full
+      '@SP\\nA=M\\n' addressing; later pushes write through
+      _PUSH_RUN_WRITE, whose AM=M+1 bumps SP while addressing the next
+      slot, and one closing _SP_INCREMENT settles SP for the run. A
+      stack-consuming command ending the run cancels against that
+      closing bump too, so the pop head disappears entirely.
+
+    While a run is open SP trails the true stack top by one, which is
+    safe because push prologues never read SP and everything after a
+    fused pop head sees SP exactly where the unfused code would have
+    left it. Address calculations that load D before popping (pop to
+    offsets > 1) don't start with the pop-head template and are never
+    disturbed; label/call/return chunks never match either pattern.
+    """
+    tail_len = len(_PUSH_D_TO_STACK)
+    head_len = len(_POP_STACK_TO_D)
+    pending = None
+    open_run = False
+    for chunk in chunks:
+        if pending is None:
+            pending = chunk
+            continue
+        # The pop head sits just after the chunk's header line
+        header_end = chunk.index('\n') + 1
+        if open_run:
+            if chunk.startswith(_POP_STACK_TO_D, header_end):
+                # Machine state after the last run write (A and SP hold
+                # the top slot's address, M and D its value) is exactly
+                # the state the pop head would produce, so both the
+                # closing SP bump and the pop head vanish
+                pending += chunk[:header_end] + chunk[header_end + head_len:]
+                open_run = False
+            elif chunk.endswith(_PUSH_D_TO_STACK):
+                pending += chunk[:-tail_len] + _PUSH_RUN_WRITE
+            else:
+                pending += _SP_INCREMENT
+                open_run = False
+                yield pending
+                pending = chunk
+            continue
+        if pending.endswith(_PUSH_D_TO_STACK):
+            if chunk.startswith(_POP_STACK_TO_D, header_end):
+                pending = (pending[:-tail_len] + _WRITE_D_TO_TOP
+                           + chunk[:header_end]
+                           + chunk[header_end + head_len:])
+                continue
+            if chunk.endswith(_PUSH_D_TO_STACK):
+                pending = (pending[:-tail_len] + _WRITE_D_TO_TOP
+                           + chunk[:-tail_len] + _PUSH_RUN_WRITE)
+                open_run = True
+                continue
+        yield pending
+        pending = chunk
+    if pending is not None:
+        if open_run:
+            pending += _SP_INCREMENT
+        yield pending
+
 
 class TranslationUnit:
     """This class takes VM Bytecode commands and translates them to Hack ASM commands.
 
+    CACHE_VERSION identifies the emitted asm dialect; bump it whenever a
+    change alters the asm this class produces so stale entries in the
+    on-disk translation cache are invalidated.
+
     Args:
         filename (str, optional): Name of file being translated.
             If no file name provided then must set using set_filename(filename_str)
@@ -11,20 +222,22 @@ class TranslationUnit:
         static_prefix/filename (str): Name of file. Used to label static variables.
         static_labels (dict): Dictionary of static labels (key) and their associated register no (value).
         current_function (str): Name of current function being translated.
-        eq_label_count (int): Count of eq command occurences for unique labels.
-        gt_label_count (int): Count of gt command occurences for unique labels.
-        lt_label_count (int): Count of lt command occurences for unique labels.
+        _cmp_counter (itertools.count): Numbers eq/gt/lt command labels uniquely.
 
     """
 
-    __MEMORY_SEGMENTS = ('local', 'argument', 'this', 'that',
-                         'constant', 'pointer', 'static', 'temp')
+    # Fixed attribute set, so slots replace the per-instance __dict__:
+    # attribute access in the emitters becomes a C-level slot load and
+    # each instance drops the dict allocation
+    __slots__ = ('static_labels', 'function_call_count', 'current_function',
+                 '_cmp_counter', '_static_push_cache', '_static_pop_cache',
+                 '_static_label_cache', '_label_cache', '_return_prefix_cache',
+                 'static_prefix', 'filename')
 
-    __MEM_SEG_MAP = {'local': 'LCL', 'argument': 'ARG',
-                     'this': 'THIS', 'that': 'THAT'}
+    __MEM_SEG_MAP = _MEM_SEG_MAP
 
-    __ARITHMETIC_COMMANDS = ('add', 'sub', 'neg', 'eq',
-                             'gt', 'lt', 'and', 'or', 'not')
+    # Bump on any change to the emitted asm (see class docstring)
+    CACHE_VERSION = 6
 
     __VAR_BASE_ADDRESS = 16     # 0x0010
     __CALL_FRAME_SIZE = 5       # 0x0005
@@ -36,17 +249,33 @@ class TranslationUnit:
     __TRUE = -1
     __FALSE = 0
 
+    # Fully translated asm cached per (segment, offset). Jack programs
+    # repeat the same few push/pop forms thousands of times, so after
+    # the first occurrence each repeat is a single dict lookup. Shared
+    # across instances/files deliberately: the asm for these segments
+    # depends only on the key. Static pushes/pops depend on the current
+    # filename as well, so those are cached per instance instead.
+    _PUSH_CACHE = {}
+    _POP_CACHE = {}
+
     # --- Constructor --- #
     def __init__(self, filename=None):
         self.static_labels = {}
-        self.function_call_count = {}
+        self.function_call_count = defaultdict(int)
         self.current_function = ''
-        self.eq_label_count = 0
-        self.gt_label_count = 0
-        self.lt_label_count = 0
+        # Free-running label counter; next() is a single C call, where
+        # the old integer attributes paid a load, add and store each.
+        # One counter shared by eq/gt/lt - the op prefix already keeps
+        # the labels distinct, so per-op sequences bought nothing.
+        self._cmp_counter = count(1)
+        self._static_push_cache = {}
+        self._static_pop_cache = {}
+        self._static_label_cache = {}
+        self._label_cache = {}
+        self._return_prefix_cache = {}
         if filename:
             self.set_filename(filename)
-            
+
     def set_filename(self, filename):
         """Sets the name of the file being translated.
 
@@ -57,6 +286,11 @@ class TranslationUnit:
         """
         self.static_prefix = self.filename = filename
         self.current_function = ''
+        # Static labels embed the filename, so their cached asm and
+        # label strings cannot carry over to the next file
+        self._static_push_cache = {}
+        self._static_pop_cache = {}
+        self._static_label_cache = {}
 
     def get_bootstrap_instructions(self):
         """Returns the Hack bootstrap instructions.
@@ -77,266 +311,247 @@ class TranslationUnit:
     def push_command(self, segment, offset):
         """This function translates a push command to hack asm.
 
+        The translated asm is cached per (segment, offset) so repeat
+        occurrences skip the build entirely.
+
         Args:
             segment (str): The memory segment that the value is being pushed from.
             offset (number): The offset within segement to be pushed to stack.
         """
-        if segment in self.__MEMORY_SEGMENTS:
-            if segment == 'constant':
-                return self.__push_constant(offset) + self.__push_d_reg_to_stack()
-            elif segment == 'static':
-                return self.__push_static(offset) + self.__push_d_reg_to_stack()
-            elif segment == 'temp':
-                return self.__push_temp(offset) + self.__push_d_reg_to_stack()
-            elif segment == 'pointer':
-                return self.__push_pointer(offset) + self.__push_d_reg_to_stack()
-            # local, argument, this, that
-            return self.__push_normal_segment(segment, offset) + self.__push_d_reg_to_stack()
-        else:
+        if segment == 'static':
+            code = self._static_push_cache.get(offset)
+            if code is None:
+                code = self.__push_static(offset) + _PUSH_D_TO_STACK
+                self._static_push_cache[offset] = code
+            return code
+        key = (segment, offset)
+        code = self._PUSH_CACHE.get(key)
+        if code is None:
+            code = self.__build_push(segment, offset)
+            self._PUSH_CACHE[key] = code
+        return code
+
+    @classmethod
+    def __build_push(cls, segment, offset):
+        """Builds the asm for a push command on a cache miss.
+
+        A single dict lookup both validates the segment and picks its
+        builder; unknown segments fall out as None.
+        """
+        builder = cls.__PUSH_BUILDERS.get(segment)
+        if builder is None:
             raise ValueError(segment + ' is not a valid memory segment')
+        return builder(cls, segment, offset)
+
+    def __push_from_template(cls, segment, offset):
+        # constant, local, argument, this, that
+        return _PUSH_TEMPLATES[segment] % offset
+
+    def __push_temp(cls, segment, offset):
+        if 0 <= offset < len(_PUSH_TEMP):
+            return _PUSH_TEMP[offset]
+        raise ValueError(
+            f'{offset} is out of temp segment bounds (8 virtual registers - 0 to 7)')
+
+    def __push_pointer(cls, segment, offset):
+        if offset == cls.__THIS_POINTER or offset == cls.__THAT_POINTER:
+            return _PUSH_POINTER[offset]
+        cls.__raise_pointer_error(offset)
+
+    # Segments mapped to their push builders. Like __ARITH_DISPATCH,
+    # assigned after the handler definitions so the table can reference
+    # them directly; builders share the signature (cls, segment, offset).
+    # 'static' is absent deliberately - push_command short-circuits it
+    # before the cache/build path is reached.
+    __PUSH_BUILDERS = {
+        'constant': __push_from_template,
+        'local': __push_from_template,
+        'argument': __push_from_template,
+        'this': __push_from_template,
+        'that': __push_from_template,
+        'temp': __push_temp,
+        'pointer': __push_pointer
+    }
 
     def __push_static(self, offset):
         label = self.__get_static_label(offset)
         return (f'@{label}\n'
                 'D=M\n')
 
-    @classmethod
-    def __push_normal_segment(cls, segment, offset):
-        """This function returns hack asm for a push to local, argument, this or that."""
-        return (f'@{cls.__MEM_SEG_MAP[segment]}\n'
-                'D=M\n'
-                f'@{offset}\n'
-                'A=D+A\n'
-                'D=M\n')
-
-    @classmethod
-    def __push_pointer(cls, pointer):
-        # Raises exception if pointer value out with limits
-        cls.__check_pointer_value(pointer)
-        if pointer == cls.__THIS_POINTER:
-            return (f'@{cls.__MEM_SEG_MAP["this"]}\n'
-                    'D=M\n')
-        else:
-            return (f'@{cls.__MEM_SEG_MAP["that"]}\n'
-                    'D=M\n')
-    
-    @classmethod
-    def __push_temp(cls, offset):
-        cls.__check_temp_address(offset)
-        return (f'@{cls.__TEMP_BASE_ADDRESS + offset}\n'
-                'D=M\n')
-
-    @staticmethod
-    def __push_constant(value):
-        return (f'@{value}\n'
-                'D=A\n')
-
-    @staticmethod
-    def __push_d_reg_to_stack():
-        return ('@SP\n'
-                'A=M\n'
-                'M=D\n'
-                '@SP\n'
-                'M=M+1\n')
-
-
     # --- Pop Methods --- #
     def pop_command(self, segment, offset):
         """This function translates a pop command to hack asm.
 
+        The translated asm is cached per (segment, offset) so repeat
+        occurrences skip the build entirely.
+
         Args:
             segment (str): The memory segment to pop to (local, static etc...).
             offset (number): the offset within segment to pop to.
         """
-
-        if segment in self.__MEMORY_SEGMENTS:
-            if segment == 'constant':
-                # If trying to pop to constant - raise Exception
-                raise ValueError('Cannot pop to constant')
-            elif segment == 'temp':
-                # The below will raise an exception if offset is beyond temp seg
-                self.__check_temp_address(offset)
-                code = self.__pop_stack_to_d_reg()
-                code += (f'@{self.__TEMP_BASE_ADDRESS + offset}\n'
-                         'M=D\n')
-                return code
-            elif segment == 'static':
+        if segment == 'static':
+            code = self._static_pop_cache.get(offset)
+            if code is None:
                 label = self.__get_static_label(offset)
-                code = self.__pop_stack_to_d_reg()
-                code += (
+                code = _POP_STACK_TO_D + (
                     f'@{label}\n'
                     'M=D\n')
-                return code
-            elif segment == 'pointer':
-                # Raises exception if pointer value out with limits
-                self.__check_pointer_value(offset)
-                if offset == self.__THIS_POINTER:
-                    label = self.__MEM_SEG_MAP['this']
-                else:
-                    label = self.__MEM_SEG_MAP['that']
-                code = self.__pop_stack_to_d_reg()
-                code += (
-                    f'@{label}\n'
-                    'M=D\n')
-                return code
-            else:
-                if offset > 1:
-                    # If offset > 1 then we have a bit of work to do
-                    # in order to setup target memory address
-                    code = (
-                        f'@{self.__MEM_SEG_MAP[segment]}\n' # Address target base pointer
-                        'D=M\n' # Bring base address of target memory segment into D register
-                        f'@{offset}\n' # Set A register to offset so that it can be added to base address
-                        'D=D+A\n' # Add offset to base address
-                        '@R13\n' # Address virtual register 13 
-                        'M=D\n' # Store targeted memory address into R13
-                    )
-                    code += self.__pop_stack_to_d_reg()
-                    code += (
-                        '@R13\n'
-                        'A=M\n'
-                        'M=D\n'
-                    )
-                    return code
-                elif offset == 1:
-                    # If offset == 1 then we can cut down the number
-                    # of assembly lines produced.
-                    code = self.__pop_stack_to_d_reg()
-                    code += (
-                        f'@{self.__MEM_SEG_MAP[segment]}\n'
-                        'A=M+1\n'
-                        'M=D\n'
-                    )
-                    return code
-                else:
-                    # offset is 0 - can do in 7 lines of asm
-                    code = self.__pop_stack_to_d_reg()
-                    code += (
-                        f'@{self.__MEM_SEG_MAP[segment]}\n'
-                        'A=M\n'
-                        'M=D\n'
-                    )
-                    return code
-        else:
-            raise ValueError(segment + ' is not a valid memory segment')
+                self._static_pop_cache[offset] = code
+            return code
+        key = (segment, offset)
+        code = self._POP_CACHE.get(key)
+        if code is None:
+            code = self.__build_pop(segment, offset)
+            self._POP_CACHE[key] = code
+        return code
 
-    @staticmethod
-    def __pop_stack_to_d_reg():
-        return (
-            '@SP\n'
-            'AM=M-1\n'  # Decrement and Dereference Stack pointer
-            'D=M\n'  # Bring target value into D register
-        )
+    @classmethod
+    def __build_pop(cls, segment, offset):
+        """Builds the asm for a pop command on a cache miss.
 
+        A single dict lookup both validates the segment and picks its
+        builder; unknown segments fall out as None and 'constant' maps
+        to a builder that always raises.
+        """
+        builder = cls.__POP_BUILDERS.get(segment)
+        if builder is None:
+            raise ValueError(segment + ' is not a valid memory segment')
+        return builder(cls, segment, offset)
+
+    def __pop_to_constant(cls, segment, offset):
+        # If trying to pop to constant - raise Exception
+        raise ValueError('Cannot pop to constant')
+
+    def __pop_normal_segment(cls, segment, offset):
+        if offset > 1:
+            # If offset > 1 then we have a bit of work to do
+            # in order to setup the target memory address (via
+            # R13), all baked into the segment's pop template
+            return _POP_TEMPLATES[segment] % offset
+        elif offset == 1:
+            # If offset == 1 then we can cut down the number
+            # of assembly lines produced.
+            return _POP_STACK_TO_D + _ADDR_SEG[segment] + (
+                'A=M+1\n'
+                'M=D\n'
+            )
+        else:
+            # offset is 0 - can do in 7 lines of asm
+            return _POP_STACK_TO_D + _ADDR_SEG[segment] + (
+                'A=M\n'
+                'M=D\n'
+            )
+
+    def __pop_temp(cls, segment, offset):
+        if 0 <= offset < len(_POP_TEMP):
+            return _POP_TEMP[offset]
+        raise ValueError(
+            f'{offset} is out of temp segment bounds (8 virtual registers - 0 to 7)')
+
+    def __pop_pointer(cls, segment, offset):
+        if offset == cls.__THIS_POINTER or offset == cls.__THAT_POINTER:
+            return _POP_POINTER[offset]
+        cls.__raise_pointer_error(offset)
+
+    # Segment->builder table for pops; see __PUSH_BUILDERS. 'constant'
+    # deliberately maps to a raising builder so the invalid-pop error
+    # takes the same path as every other segment.
+    __POP_BUILDERS = {
+        'constant': __pop_to_constant,
+        'local': __pop_normal_segment,
+        'argument': __pop_normal_segment,
+        'this': __pop_normal_segment,
+        'that': __pop_normal_segment,
+        'temp': __pop_temp,
+        'pointer': __pop_pointer
+    }
 
     # --- Arithmetic & Logical methods --- #
     def arithmetic_command(self, command):
         """This function translates an arithmetic command to hack asm.
 
+        Dispatches through a class-level dict of handlers; one hash
+        lookup replaces the old chain of string comparisons.
+
         Args:
             command (str): The arithmetic command to be translated to ASM.
         """
-        if command in self.__ARITHMETIC_COMMANDS:
-            if command == 'add':
-                return self.__add_command()
-            elif command == 'sub':
-                return self.__sub_command()
-            elif command == 'neg':
-                return self.__neg_command()
-            elif command == 'eq':
-                return self.__eq_command()
-            elif command == 'gt':
-                return self.__gt_command()
-            elif command == 'lt':
-                return self.__lt_command()
-            elif command == 'and':
-                return self.__and_command()
-            elif command == 'or':
-                return self.__or_command()
-            elif command == 'not':
-                return self.__not_command()
+        handler = self.__ARITH_DISPATCH.get(command)
+        if handler is not None:
+            return handler(self)
 
-    @staticmethod
-    def __add_command():
-        return TranslationUnit.__add_or_sub_command('add')
+    # add/sub/neg/and/or/not translate to constant asm, so their
+    # handlers just hand back the precomputed module-level strings
 
-    @staticmethod
-    def __sub_command():
-        return TranslationUnit.__add_or_sub_command('sub')
+    def __add_command(self):
+        return _ADD_ASM
 
-    @staticmethod
-    def __neg_command():
-        return ('@SP\n'
-                'A=M-1\n'
-                'M=-M\n')
+    def __sub_command(self):
+        return _SUB_ASM
 
-    @staticmethod
-    def __and_command():
-        return TranslationUnit.__logical_command('&')
+    def __neg_command(self):
+        return _NEG_ASM
 
-    @staticmethod
-    def __or_command():
-        return TranslationUnit.__logical_command('|')
+    def __and_command(self):
+        return _AND_ASM
 
-    @staticmethod
-    def __not_command():
-        return ('@SP\n'
-                'A=M-1\n'
-                'M=!M\n')
+    def __or_command(self):
+        return _OR_ASM
+
+    def __not_command(self):
+        return _NOT_ASM
 
     def __eq_command(self):
-        self.eq_label_count += 1
-        return self.__comparison_command(f'EQ{self.eq_label_count}', 'JEQ')
+        return self.__comparison_command(f'EQ{next(self._cmp_counter)}', 'JEQ')
 
     def __gt_command(self):
-        self.gt_label_count += 1
-        return self.__comparison_command(f'GT{self.gt_label_count}', 'JGT')
+        return self.__comparison_command(f'GT{next(self._cmp_counter)}', 'JGT')
 
     def __lt_command(self):
-        self.lt_label_count += 1
-        return self.__comparison_command(f'LT{self.lt_label_count}', 'JLT')
+        return self.__comparison_command(f'LT{next(self._cmp_counter)}', 'JLT')
         
-    @staticmethod
-    def __add_or_sub_command(command):
-        command = 'M=M+D\n' if command == 'add' else 'M=M-D\n'
-        code = TranslationUnit.__pop_stack_to_d_reg()
-        code += f'A=A-1\n{command}'
-        return code
-
     @staticmethod
     def __comparison_command(label, condition):
         """Produces Hack asm for a gt, lt or eq command.
 
+        Single-jump form: the result slot is speculatively set to true
+        (-1) while D still holds the difference; if the comparison
+        holds, the jump skips straight past the fix-up that overwrites
+        the slot with false (0). One label and one conditional jump
+        against the old two-label trampoline's two of each. Hack has no
+        shift or and-with-constant instruction, so a fully branchless
+        sign-extraction form is not expressible on this ISA.
+
         Args:
-            label (str): Label to use for conditional jumps
+            label (str): Label marking the end of the comparison
             condition (str): Condition to use for jump
         """
-        code = TranslationUnit.__pop_stack_to_d_reg()
-        code += (
+        return _POP_STACK_TO_D + (
             'A=A-1\n'
             'D=M-D\n'
+            f'M={TranslationUnit.__TRUE}\n'
             f'@{label}\n'
             f'D;{condition}\n'
-            f'D={TranslationUnit.__FALSE}\n'
-            f'@{label}_END\n'
-            '0;JMP\n'
-            f'({label})\n'
-            f'D={TranslationUnit.__TRUE}\n'
-            f'({label}_END)\n'
             '@SP\n'
             'A=M-1\n'
-            'M=D\n'
+            f'M={TranslationUnit.__FALSE}\n'
+            f'({label})\n'
         )
-        return code
 
-    @staticmethod
-    def __logical_command(logical_op):
-        code = TranslationUnit.__pop_stack_to_d_reg()
-        code += (
-            'A=A-1\n'
-            f'M=D{logical_op}M\n'
-        )
-        return code
+    # Arithmetic commands mapped to their handlers. Assigned after the
+    # handler definitions so the table can reference them directly;
+    # handlers share the uniform signature (self) -> str.
+    __ARITH_DISPATCH = {
+        'add': __add_command,
+        'sub': __sub_command,
+        'neg': __neg_command,
+        'eq': __eq_command,
+        'gt': __gt_command,
+        'lt': __lt_command,
+        'and': __and_command,
+        'or': __or_command,
+        'not': __not_command
+    }
 
 
     # --- Branching methods --- #
@@ -353,7 +568,7 @@ class TranslationUnit:
 
     def conditional_goto_command(self, label):
         """Returns Hack asm for conditionally branching to a given label"""
-        code = TranslationUnit.__pop_stack_to_d_reg()
+        code = _POP_STACK_TO_D
         code += (
             f'@{self.__get_label(label)}\n'
             'D;JNE\n' # Jump if D not FALSE (0)
@@ -372,38 +587,43 @@ class TranslationUnit:
 
         Args:
             function_name (str): Unique label for function
-            arg_count (str/int): Number of args pushed for function call  
-        
+            arg_count (str/int): Number of args pushed for function call
+
         """
+        # The parser hands over an int, but coerce here so the constant
+        # fold in __set_arg_pointer is safe for any caller
+        arg_count = int(arg_count)
 
         # The unique label for returning to caller.
         # The assembler will turn this into an instruction pointer.
         return_label = self.__get_return_label(function_name)
 
+        # Collect the fragments and join once at the end; repeated
+        # string += would copy the growing code on every step.
         # Save return label (instruction pointer) to frame[0]
-        code = self.__push_return_address_to_stack(return_label)
+        parts = [self.__push_return_address_to_stack(return_label)]
 
         # Memory segments of caller to be saved to frame[1-4]
         segments_to_save = ('LCL', 'ARG', 'THIS', 'THAT')
         for segment in segments_to_save:
-            code += self.__push_segment_pointer_to_stack(segment)
+            parts.append(self.__push_segment_pointer_to_stack(segment))
 
         # Set ARG pointer for function call
-        code += self.__set_arg_pointer(arg_count)
+        parts.append(self.__set_arg_pointer(arg_count))
 
         # Set LCL pointer for function call
-        code += self.__set_local_pointer()
+        parts.append(self.__set_local_pointer())
 
         # All set; Jump to function
-        code += (
+        parts.append(
             f'@{function_name}\n'
             '0;JMP\n'
         )
 
         # Insert return label into ASM for returning back to correct asm command
         # after the function returns.
-        code += f'({return_label})\n'
-        return code
+        parts.append(f'({return_label})\n')
+        return ''.join(parts)
 
 
     def function_declaration(self, function_name, local_count):
@@ -417,17 +637,11 @@ class TranslationUnit:
         # We're setting up a function so all labels within it need to be unique. 
         # Use function name as the prefix. 
         self.current_function = function_name
-        code = f'({function_name})\n'
-        while local_count > 0:
-            local_count -= 1
-            code += (
-                '@SP\n'
-                'A=M\n'
-                'M=0\n'
-                '@SP\n'
-                'M=M+1\n'
-            )
-        return code
+        if local_count < len(_LOCAL_INIT_TABLE):
+            local_init = _LOCAL_INIT_TABLE[local_count]
+        else:
+            local_init = _LOCAL_INIT_ASM * local_count
+        return f'({function_name})\n' + local_init
 
     def return_from_function(self):
         """Returns hack asm that handles returning from a function"""
@@ -436,28 +650,37 @@ class TranslationUnit:
         end_frame = 13
         # Where in RAM to store the return address (instruction pointer)
         return_address = 14
-        # Store the address of the end of the frame and the return address (instruction pointer)
-        code = self.__store_end_frame_and_return_addr(end_frame, return_address)
-        # Push result of function call to end of callers stack
-        code += self.__save_result_to_stack()
-        # Reset SP to top of callers stack
-        code += self.__reset_stack_pointer_to_caller()
-        # Restore callers memory segments from call frame
-        code += self.__restore_caller_segments(end_frame)
-        # Jump to return address
-        code += (
+        parts = [
+            # Store the address of the end of the frame and the return address (instruction pointer)
+            self.__store_end_frame_and_return_addr(end_frame, return_address),
+            # Push result of function call to end of callers stack
+            self.__save_result_to_stack(),
+            # Reset SP to top of callers stack
+            self.__reset_stack_pointer_to_caller(),
+            # Restore callers memory segments from call frame
+            _RESTORE_CALLER_ASM,
+            # Jump to return address
             f'@R{return_address}\n'
             'A=M\n'
             '0;JMP\n'
-        )
-        return code
+        ]
+        return ''.join(parts)
         
     def __get_label(self, label):
         """Builds formatted asm label"""
-        # Label format: {filename}.{function_name}${label}
-        # return f'{self.filename}.{self.__get_current_function()}${label}'
-        # The function labels seem to have the Filename prepended by the compiler
-        return f'{self.current_function}${label}'
+        # The same (function, label) pair recurs for every loop
+        # back-edge, so formatted labels are memoized per instance
+        key = (self.current_function, label)
+        value = self._label_cache.get(key)
+        if value is None:
+            # Label format: {filename}.{function_name}${label}
+            # value = f'{self.filename}.{self.__get_current_function()}${label}'
+            # The function labels seem to have the Filename prepended by the compiler.
+            # Interned: the same label string recurs as a dict key for
+            # every use, and interned keys compare by identity.
+            value = intern(f'{self.current_function}${label}')
+            self._label_cache[key] = value
+        return value
 
     @staticmethod
     def __store_end_frame_and_return_addr(end_frame, return_address):
@@ -480,7 +703,7 @@ class TranslationUnit:
     def __save_result_to_stack():
         # push result of function to end of callers stack. 
         # *ARG = pop() // ARG points where we want the result of the function to go.
-        code = TranslationUnit.__pop_stack_to_d_reg()
+        code = _POP_STACK_TO_D
         code += (
             '@ARG\n'
             'A=M\n'
@@ -501,46 +724,29 @@ class TranslationUnit:
         )
         return code
 
-    @staticmethod
-    def __restore_caller_segments(end_frame_pointer):
-        # Memory segments of caller to be restored from frame[1-4]
-        segments_to_restore = ('LCL', 'ARG', 'THIS', 'THAT')
-        code = ''
-        for index, segment in enumerate(segments_to_restore, 1):
-            offset = TranslationUnit.__CALL_FRAME_SIZE - index
-            code += (
-                f'@R{end_frame_pointer}\n'
-                'D=M\n'
-                f'@{offset}\n'
-                'D=D-A\n'
-                'A=D\n'
-                'D=M\n'
-                f'@{segment}\n'
-                'M=D\n'
-            )
-        return code
-
-
     @staticmethod
     def __push_return_address_to_stack(label):
         code = f'@{label}\nD=A\n'
-        code += TranslationUnit.__push_d_reg_to_stack()
+        code += _PUSH_D_TO_STACK
         return code
 
     @staticmethod
     def __push_segment_pointer_to_stack(segment_label):
-        code = f'@{segment_label}\nD=M\n'
-        code += TranslationUnit.__push_d_reg_to_stack()
+        code = _LOAD_LABEL_D[segment_label]
+        code += _PUSH_D_TO_STACK
         return code
 
     @staticmethod
     def __set_arg_pointer(arg_count):
+        # ARG = SP - frame size - arg count; both subtrahends are known
+        # here, so they are folded into a single constant and the asm
+        # does one subtraction instead of two
+        total = TranslationUnit.__CALL_FRAME_SIZE + arg_count
+        at_total = _AT_DEC[total] if total < len(_AT_DEC) else f'@{total}\n'
         return (
             '@SP\n'
             'D=M\n'
-            f'@{TranslationUnit.__CALL_FRAME_SIZE}\n'
-            'D=D-A\n'
-            f'@{arg_count}\n'
+            + at_total +
             'D=D-A\n'
             '@ARG\n'
             'M=D\n'
@@ -551,28 +757,39 @@ class TranslationUnit:
         return '@SP\nD=M\n@LCL\nM=D\n'
 
     def __get_return_label(self, function_name):
+        # The same function name keys several dicts (call counts, the
+        # prefix cache) across its call sites; interning it makes those
+        # lookups identity compares
+        function_name = intern(function_name)
         # Get the next call count to make label unique
         call_count = self.__get_function_call_count(function_name)
 
-        return f'{function_name}$ret.{call_count}'
+        # The call count changes every time, but the '{name}$ret.'
+        # prefix doesn't, so only the count is formatted per call
+        prefix = self._return_prefix_cache.get(function_name)
+        if prefix is None:
+            prefix = function_name + '$ret.'
+            self._return_prefix_cache[function_name] = prefix
+        return prefix + str(call_count)
 
     def __get_function_call_count(self, function_name):
-        if not function_name in self.function_call_count:
-            # First time function_name has appeared? Return 1 and add to dict
-            self.function_call_count[function_name] = 1
-            return 1
-        else:
-            # Increment counter for function_name and return new count
-            self.function_call_count[function_name] += 1
-            return self.function_call_count[function_name]
+        # defaultdict(int) starts unseen names at 0, so the first call
+        # returns 1 just as before, without the membership test
+        self.function_call_count[function_name] += 1
+        return self.function_call_count[function_name]
 
 
     # --- Other methods --- #
     def __get_static_label(self, offset):
-        label = f'{self.static_prefix}.{str(offset)}'
-        if not label in self.static_labels:
-            count = len(self.static_labels)
-            self.static_labels[label] = self.__VAR_BASE_ADDRESS + count
+        label = self._static_label_cache.get(offset)
+        if label is None:
+            # Interned so repeat lookups in static_labels hit the
+            # identity fast path
+            label = intern(f'{self.static_prefix}.{offset}')
+            self._static_label_cache[offset] = label
+            if not label in self.static_labels:
+                count = len(self.static_labels)
+                self.static_labels[label] = self.__VAR_BASE_ADDRESS + count
         return label # self.static_labels[label]
     
     @staticmethod
@@ -582,17 +799,29 @@ class TranslationUnit:
         else:
             raise ValueError('VM can only store temps in RAM[13] to RAM[15]')
     
+    @staticmethod
+    def __raise_pointer_error(value):
+        # Cold path shared by the inlined pointer checks in the builders
+        raise ValueError(
+            'value provided to push pointer can only be 0 or 1\n\t' + str(value) + ' provided')
+
     @classmethod
-    def __check_temp_address(cls, offset):
-        base_addr = cls.__TEMP_BASE_ADDRESS
-        max_addr = cls.__TEMP_MAX_ADDRESS
+    def _warm_caches(cls, max_offset=32):
+        """Prebuilds the push/pop caches for small offsets.
 
-        if offset < 0 or (base_addr + offset) > max_addr:
-            raise ValueError(
-                f'{offset} is out of temp segment bounds (8 virtual registers - 0 to 7)')
+        Offsets in Jack code are almost always small, so building the
+        common (segment, offset) entries at import time means even the
+        first occurrence of these commands skips the build path.
+        Anything beyond max_offset still populates lazily.
+        """
+        for segment in cls.__MEM_SEG_MAP:
+            for offset in range(max_offset):
+                cls._PUSH_CACHE[(segment, offset)] = cls.__build_push(segment, offset)
+                cls._POP_CACHE[(segment, offset)] = cls.__build_pop(segment, offset)
+        # Small constants repeat just as heavily
+        for value in range(max_offset):
+            cls._PUSH_CACHE[('constant', value)] = cls.__build_push('constant', value)
 
-    @classmethod
-    def __check_pointer_value(cls, value):
-        if value != cls.__THIS_POINTER and value != cls.__THAT_POINTER:
-            raise ValueError(
-                'value provided to push pointer can only be 0 or 1\n\t' + str(value) + ' provided')
+
+# Warm the common cache entries once at import time
+TranslationUnit._warm_caches()